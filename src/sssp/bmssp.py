@@ -16,16 +16,20 @@ guarantee. See README for the practical/theoretical gap.
 
 from __future__ import annotations
 
+import functools
 import heapq
 import math
-from collections import defaultdict
 from collections.abc import Iterable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 Vertex = int
 Weight = float
 Edge = tuple[Vertex, Weight]
 
+# Predecessor sentinel used inside the driver, so pred stays a homogeneous int
+# array; sssp() maps it back to None at the API boundary.
+_NO_PRED: Vertex = -1
+
 
 class Graph:
     """Directed graph with non-negative real edge weights."""
@@ -58,6 +62,23 @@ class Graph:
         self.adj[u].append((v, w))
 
 
+@functools.lru_cache(maxsize=None)
+def _params(n: int) -> tuple[int, int, int]:
+    """Return ``(k, t, l_max)`` for an n-vertex graph.
+
+    Depends only on n, so it is cached across ``sssp`` calls on same-sized
+    graphs.
+    """
+    log_n = math.log(max(n, 2), 2)
+    # max(3, ...) guards small n where log^(1/3) n collapses to 0/1 and
+    # would make the recursion degenerate.
+    k = max(3, int(log_n ** (1 / 3)))
+    t = max(3, int(log_n ** (2 / 3)))
+    # Recursion depth: ceil(log_2(n) / t). max(...) guards small n.
+    l_max = max(1, math.ceil(log_n / t))
+    return k, t, l_max
+
+
 @dataclass
 class _BMSSPState:
     """Mutable state shared across recursive BMSSP calls.
@@ -69,25 +90,26 @@ class _BMSSPState:
 
     graph: Graph
     db: list[Weight]
-    pred: list[Vertex | None]
+    # pred[v] is _NO_PRED until v is first relaxed.
+    pred: list[Vertex]
     # pred_weight[v] is the weight of the edge (pred[v], v) that produced db[v].
     # Recording it at relaxation time avoids re-discovering the relaxed edge with
     # a floating-point equality check later.
-    pred_weight: list[Weight | None]
+    pred_weight: list[Weight]
     k: int
     t: int
+    # Membership mask for the W set built by _find_pivots. find_pivots does
+    # not recurse, so one mask serves every call; it is all zeros between
+    # calls.
+    in_W: bytearray
 
     @classmethod
     def initial(cls, graph: Graph, source: Vertex) -> "_BMSSPState":
         n = graph.n
-        # max(3, ...) guards small n where log^(1/3) n collapses to 0/1 and
-        # would make the recursion degenerate.
-        log_n = math.log(max(n, 2), 2)
-        k = max(3, int(log_n ** (1 / 3)))
-        t = max(3, int(log_n ** (2 / 3)))
+        k, t, _ = _params(n)
         db: list[Weight] = [math.inf] * n
-        pred: list[Vertex | None] = [None] * n
-        pred_weight: list[Weight | None] = [None] * n
+        pred: list[Vertex] = [_NO_PRED] * n
+        pred_weight: list[Weight] = [0.0] * n
         db[source] = 0.0
         return cls(
             graph=graph,
@@ -96,37 +118,31 @@ class _BMSSPState:
             pred_weight=pred_weight,
             k=k,
             t=t,
+            in_W=bytearray(n),
         )
 
-    def relax(self, u: Vertex, v: Vertex, w: Weight) -> bool:
-        """Try to relax edge (u, v, w). Returns True iff db[v] strictly improved."""
-        new_dist = self.db[u] + w
-        if new_dist < self.db[v]:
-            self.db[v] = new_dist
-            self.pred[v] = u
-            self.pred_weight[v] = w
-            return True
-        return False
-
 
 class _LazyHeapFrontier:
     """Heap-with-lazy-deletion frontier for the BMSSP D set.
 
     Supports add(v) and pull(M) which returns at most M vertices with the
     smallest current ``db[v]`` plus the next boundary value (smallest db
-    remaining in the frontier, or +inf if empty).
-
-    The heap stores ``(db_at_push, vertex)``. When popped, an entry is treated
-    as stale if either (a) the vertex is no longer in the frontier (already
-    pulled or removed) or (b) db[v] has decreased since the entry was pushed.
+    remaining in the frontier, or +inf if empty). A pull costs
+    O(M log |D|) rather than a sort of the whole set.
+
+    The heap stores ``(db_at_push, vertex)`` and ``_key`` maps each vertex in
+    the frontier to the key of its newest entry. An entry is live only if it
+    is that newest entry and db[v] has not decreased since it was pushed;
+    anything else is stale and dropped when it reaches the top. Re-adding a
+    vertex whose live entry already carries its current db is a no-op.
     """
 
-    __slots__ = ("_db", "_heap", "_in_set")
+    __slots__ = ("_db", "_heap", "_key")
 
     def __init__(self, db: list[Weight], initial: Iterable[Vertex] = ()) -> None:
         self._db = db
         self._heap: list[tuple[Weight, Vertex]] = []
-        self._in_set: set[Vertex] = set()
+        self._key: dict[Vertex, Weight] = {}
         for v in initial:
             self.add(v)
 
@@ -134,17 +150,20 @@ class _LazyHeapFrontier:
         return self._peek_live() is not None
 
     def add(self, v: Vertex) -> None:
-        # We always push, even if v is already in the set with an older
-        # (larger) key; the older entry will be skipped when popped.
-        self._in_set.add(v)
-        heapq.heappush(self._heap, (self._db[v], v))
+        d = self._db[v]
+        if self._key.get(v) == d:
+            return
+        # Any older entry for v now has a different key and goes stale.
+        self._key[v] = d
+        heapq.heappush(self._heap, (d, v))
 
     def _peek_live(self) -> tuple[Weight, Vertex] | None:
-        while self._heap:
-            d, v = self._heap[0]
-            if v in self._in_set and d == self._db[v]:
+        heap, key, db = self._heap, self._key, self._db
+        while heap:
+            d, v = heap[0]
+            if key.get(v) == d == db[v]:
                 return d, v
-            heapq.heappop(self._heap)
+            heapq.heappop(heap)
         return None
 
     def pull(self, m: int) -> tuple[Weight, set[Vertex]]:
@@ -156,81 +175,123 @@ class _LazyHeapFrontier:
                 break
             _, v = top
             heapq.heappop(self._heap)
-            self._in_set.discard(v)
+            del self._key[v]
             pulled.add(v)
         next_top = self._peek_live()
         next_boundary = next_top[0] if next_top is not None else math.inf
         return next_boundary, pulled
 
 
+def _bounded_dijkstra(
+    adj: list[list[Edge]],
+    db: list[Weight],
+    pred: list[Vertex],
+    pred_weight: list[Weight],
+    x: Vertex,
+    B: Weight,
+) -> set[Vertex]:
+    """Dijkstra from x over adj, settling only distances below B.
+
+    Takes the state arrays directly rather than ``_BMSSPState`` and binds the
+    heapq functions to locals, so the loop does no attribute lookups. Returns
+    the settled vertices.
+    """
+    heappush, heappop = heapq.heappush, heapq.heappop
+    discovered: set[Vertex] = set()
+    settle = discovered.add
+    heap: list[tuple[Weight, Vertex]] = [(db[x], x)]
+
+    while heap:
+        du, u = heappop(heap)
+        if u in discovered:
+            continue
+        settle(u)
+        for v, w in adj[u]:
+            new_dist = du + w
+            if new_dist <= db[v] and new_dist < B:
+                db[v] = new_dist
+                pred[v] = u
+                pred_weight[v] = w
+                if v not in discovered:
+                    heappush(heap, (new_dist, v))
+
+    return discovered
+
+
 def _base_case(
     state: _BMSSPState, B: Weight, S: set[Vertex]
 ) -> tuple[Weight, set[Vertex]]:
     """Singleton-source mini-Dijkstra bounded by B. S is non-empty."""
     # S is a non-empty singleton at l == 0, drained from the frontier above.
     x = next(iter(S))
-    discovered: set[Vertex] = set()
-    heap: list[tuple[Weight, Vertex]] = [(state.db[x], x)]
-    visited: set[Vertex] = set()
-
-    while heap:
-        _, u = heapq.heappop(heap)
-        if u in visited:
-            continue
-        visited.add(u)
-        discovered.add(u)
-        for v, w in state.graph.adj[u]:
-            new_dist = state.db[u] + w
-            if new_dist <= state.db[v] and new_dist < B:
-                state.db[v] = new_dist
-                state.pred[v] = u
-                state.pred_weight[v] = w
-                if v not in visited:
-                    heapq.heappush(heap, (state.db[v], v))
-
+    discovered = _bounded_dijkstra(
+        state.graph.adj,
+        state.db,
+        state.pred,
+        state.pred_weight,
+        x,
+        B,
+    )
     return B, discovered
 
 
 def _find_pivots(
     state: _BMSSPState, B: Weight, S: set[Vertex]
-) -> tuple[set[Vertex], set[Vertex]]:
+) -> tuple[set[Vertex], list[Vertex]]:
     """Run k bounded relaxation rounds from S, then identify pivots whose
     relaxed-forest subtrees have size >= k."""
     k = state.k
-    db = state.db
+    db, pred, pred_weight = state.db, state.pred, state.pred_weight
     adj = state.graph.adj
 
-    W: set[Vertex] = set(S)
-    Wi: set[Vertex] = set(S)
-    # Track which vertex's pred was assigned during this find_pivots call so we
-    # can build the relaxed forest from authoritative parent pointers without
-    # re-scanning adjacency lists later.
-    relaxed_parent: dict[Vertex, Vertex] = {}
+    # W is kept as a member list plus the shared byte mask: membership tests
+    # are a single index, and the mask is reset by walking the list.
+    in_W = state.in_W
+    W: list[Vertex] = list(S)
+    for s in W:
+        in_W[s] = 1
+    grow = W.append
+    W_limit = k * len(S)
+    # S is only read, so the first round iterates it directly.
+    Wi: Iterable[Vertex] = S
 
     for _ in range(k):
         Wi_next: set[Vertex] = set()
+        reach = Wi_next.add
         for u in Wi:
+            # Gather db[u] once per frontier vertex. Weights are non-negative,
+            # so a vertex already at or past B cannot relax anything.
+            du = db[u]
+            if du >= B:
+                continue
             for v, w in adj[u]:
-                new_dist = db[u] + w
+                new_dist = du + w
                 if new_dist <= db[v] and new_dist < B:
                     db[v] = new_dist
-                    state.pred[v] = u
-                    state.pred_weight[v] = w
-                    relaxed_parent[v] = u
-                    Wi_next.add(v)
+                    pred[v] = u
+                    pred_weight[v] = w
+                    reach(v)
+                    # W |= Wi_next, folded into the relaxation: first-time
+                    # members are caught here, so W needs no per-step pass.
+                    if not in_W[v]:
+                        in_W[v] = 1
+                        grow(v)
         Wi = Wi_next
-        W |= Wi
-        if len(W) > k * len(S):
-            return set(S), W
-
-    # Build the relaxed-forest restricted to W by walking parent pointers we
-    # recorded above. This avoids the previous code's "rescan adjacency to
-    # match db with float tolerance" pattern.
-    forest_children: dict[Vertex, set[Vertex]] = defaultdict(set)
+        if len(W) > W_limit:
+            for v in W:
+                in_W[v] = 0
+            return S, W
+
+    # Build the relaxed forest on W: v hangs under pred[v] when both are in W
+    # and the recorded edge is still tight. db[v] was assigned exactly
+    # db[pred[v]] + pred_weight[v], so the equality holds bit-for-bit unless
+    # db[pred[v]] has since dropped; no tolerance or adjacency scan is needed.
+    forest_children: dict[Vertex, list[Vertex]] = {}
     forest_has_parent: set[Vertex] = set()
-    for v, parent in relaxed_parent.items():
-        if v in W and parent in W:
-            forest_children[parent].add(v)
+    for v in W:
+        parent = pred[v]
+        if parent != _NO_PRED and in_W[parent] and db[v] == db[parent] + pred_weight[v]:
+            forest_children.setdefault(parent, []).append(v)
             forest_has_parent.add(v)
 
     def subtree_size(root: Vertex) -> int:
@@ -253,13 +314,43 @@ def _find_pivots(
             continue
         if subtree_size(s) >= k:
             pivots.add(s)
+    for v in W:
+        in_W[v] = 0
     return pivots, W
 
 
-def _bmssp(
-    state: _BMSSPState, level: int, B: Weight, S: set[Vertex]
-) -> tuple[Weight, set[Vertex]]:
-    """Bounded multi-source SSSP: process sources S within bound B at recursion level `level`."""
+@dataclass(slots=True)
+class _BMSSPFrame:
+    """One suspended level >= 1 BMSSP call on the explicit driver stack.
+
+    Holds everything the recursive formulation kept in locals across its
+    recursive call: the frontier D, the accumulated U, and the batch (Bi, Si)
+    whose child call is in flight.
+    """
+
+    level: int
+    B: Weight
+    W: list[Vertex]
+    frontier: _LazyHeapFrontier
+    termination_bound: int
+    pull_size: int
+    U: set[Vertex] = field(default_factory=set)
+    Bi: Weight = math.inf
+    Si: set[Vertex] = field(default_factory=set)
+    # Set once |U| reaches the termination bound; B_prime then holds B'_i.
+    done: bool = False
+    B_prime: Weight = math.inf
+
+
+def _open_frame(
+    state: _BMSSPState,
+    level: int,
+    B: Weight,
+    S: set[Vertex],
+    stack: list[_BMSSPFrame],
+) -> tuple[Weight, set[Vertex]] | None:
+    """Start a BMSSP call. Returns its result directly if it needs no
+    sub-calls (base case, or no pivots); otherwise pushes a frame."""
     if level == 0:
         return _base_case(state, B, S)
 
@@ -267,51 +358,100 @@ def _bmssp(
     if not P:
         return B, set()
 
-    frontier = _LazyHeapFrontier(state.db, initial=P)
-    U: set[Vertex] = set()
-
     k, t = state.k, state.t
-    termination_bound = k * (2 ** (level * t))
-    pull_size = 2 ** ((level - 1) * t)
-
-    B_prime = B
-    while len(U) < termination_bound and frontier:
-        Bi, Si = frontier.pull(pull_size)
-        B_prime_i, Ui = _bmssp(state, level - 1, Bi, Si)
-        U |= Ui
-
-        # Relax edges from Ui; route newly relaxed vertices to either the
-        # batch-prepend set (K) or back into the frontier depending on which
-        # range their new distance falls in.
-        K: set[Vertex] = set()
-        for u in Ui:
-            for v, w in state.graph.adj[u]:
-                if state.relax(u, v, w):
-                    new_dist = state.db[v]
-                    if B_prime_i <= new_dist < Bi:
-                        K.add(v)
-                    elif Bi <= new_dist < B:
-                        frontier.add(v)
-
-        for v in K:
-            frontier.add(v)
-        for s in Si:
-            if B_prime_i <= state.db[s] < Bi:
-                frontier.add(s)
-
-        if len(U) >= termination_bound:
-            B_prime = B_prime_i
-            break
-    else:
-        B_prime = B
-
-    for w in W:
-        if state.db[w] < B_prime:
-            U.add(w)
+    stack.append(
+        _BMSSPFrame(
+            level=level,
+            B=B,
+            W=W,
+            frontier=_LazyHeapFrontier(state.db, initial=P),
+            termination_bound=k * (2 ** (level * t)),
+            pull_size=2 ** ((level - 1) * t),
+        )
+    )
+    return None
 
+
+def _absorb_child(
+    state: _BMSSPState, frame: _BMSSPFrame, B_prime_i: Weight, Ui: set[Vertex]
+) -> None:
+    """Fold a finished child call for frame's current batch back into frame."""
+    db, pred, pred_weight = state.db, state.pred, state.pred_weight
+    adj = state.graph.adj
+    enqueue = frame.frontier.add
+    B, Bi, Si = frame.B, frame.Bi, frame.Si
+    frame.U |= Ui
+
+    # Relax edges from Ui; route newly relaxed vertices to either the
+    # batch-prepend set (K) or back into the frontier depending on which
+    # range their new distance falls in.
+    K: set[Vertex] = set()
+    for u in Ui:
+        du = db[u]
+        for v, w in adj[u]:
+            new_dist = du + w
+            if new_dist < db[v]:
+                db[v] = new_dist
+                pred[v] = u
+                pred_weight[v] = w
+                if B_prime_i <= new_dist < Bi:
+                    K.add(v)
+                elif Bi <= new_dist < B:
+                    enqueue(v)
+
+    for v in K:
+        enqueue(v)
+    for s in Si:
+        if B_prime_i <= db[s] < Bi:
+            enqueue(s)
+
+    if len(frame.U) >= frame.termination_bound:
+        frame.done = True
+        frame.B_prime = B_prime_i
+
+
+def _close_frame(state: _BMSSPState, frame: _BMSSPFrame) -> tuple[Weight, set[Vertex]]:
+    """Finish frame's call: add complete vertices of W and return (B', U)."""
+    # Stopping on the termination bound reports B'_i; draining D reports B.
+    B_prime = frame.B_prime if frame.done else frame.B
+    db = state.db
+    U = frame.U
+    for w in frame.W:
+        if db[w] < B_prime:
+            U.add(w)
     return B_prime, U
 
 
+def _bmssp(
+    state: _BMSSPState, level: int, B: Weight, S: set[Vertex]
+) -> tuple[Weight, set[Vertex]]:
+    """Bounded multi-source SSSP: process sources S within bound B at recursion level `level`.
+
+    Runs the recursion on an explicit stack of ``_BMSSPFrame`` objects, one
+    per active level: each step either hands a child's result back to the
+    top frame or pulls that frame's next batch and opens a child call on it.
+    """
+    stack: list[_BMSSPFrame] = []
+    # The (B', U) result of the most recently finished call, waiting to be
+    # absorbed by the frame below it.
+    result = _open_frame(state, level, B, S, stack)
+    while stack:
+        frame = stack[-1]
+        if result is not None:
+            _absorb_child(state, frame, *result)
+            result = None
+        if frame.done or not (
+            len(frame.U) < frame.termination_bound and frame.frontier
+        ):
+            stack.pop()
+            result = _close_frame(state, frame)
+            continue
+        frame.Bi, frame.Si = frame.frontier.pull(frame.pull_size)
+        result = _open_frame(state, frame.level - 1, frame.Bi, frame.Si, stack)
+    assert result is not None
+    return result
+
+
 def sssp(graph: Graph, source: Vertex) -> tuple[list[Weight], list[Vertex | None]]:
     """Single-source shortest paths from ``source`` in ``graph``.
 
@@ -329,12 +469,10 @@ def sssp(graph: Graph, source: Vertex) -> tuple[list[Weight], list[Vertex | None
         raise ValueError(f"source out of range: source={source} not in [0, {graph.n})")
 
     state = _BMSSPState.initial(graph, source)
-
-    # Recursion depth: ceil(log_2(n) / t). max(...) guards small n.
-    log_n = math.log(max(graph.n, 2), 2)
-    l_max = max(1, math.ceil(log_n / state.t))
+    _, _, l_max = _params(graph.n)
     _bmssp(state, l_max, math.inf, {source})
-    return state.db, state.pred
+    pred: list[Vertex | None] = [None if p == _NO_PRED else p for p in state.pred]
+    return state.db, pred
 
 
 if __name__ == "__main__":
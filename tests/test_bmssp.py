@@ -8,6 +8,7 @@ import random
 import pytest
 
 from sssp import Graph, sssp
+from sssp.bmssp import _BMSSPState, _LazyHeapFrontier, _find_pivots, _params
 
 from tests._dijkstra import dijkstra, path_weight, reconstruct_path
 
@@ -311,6 +312,89 @@ class TestPredecessorInvariants:
         self._check_pred_tree(g, 0)
 
 
+# ---------------------------------------------------------------------------
+# Parameters
+# ---------------------------------------------------------------------------
+
+
+class TestParams:
+    @pytest.mark.parametrize(
+        "n, expected",
+        [(1, (3, 3, 1)), (2, (3, 3, 1)), (1024, (3, 4, 3)), (10**6, (3, 7, 3))],
+    )
+    def test_values(self, n, expected):
+        assert _params(n) == expected
+
+
+# ---------------------------------------------------------------------------
+# Frontier
+# ---------------------------------------------------------------------------
+
+
+class TestLazyHeapFrontier:
+    def test_pull_returns_smallest_and_next_boundary(self):
+        db = [5.0, 1.0, 3.0, 2.0, 4.0]
+        frontier = _LazyHeapFrontier(db, initial=range(5))
+        boundary, pulled = frontier.pull(2)
+        assert pulled == {1, 3}
+        assert boundary == 3.0
+        boundary, pulled = frontier.pull(10)
+        assert pulled == {0, 2, 4}
+        assert boundary == math.inf
+        assert not frontier
+
+    def test_readd_at_same_key_does_not_duplicate(self):
+        db = [1.0, 2.0]
+        frontier = _LazyHeapFrontier(db, initial=[0, 1])
+        frontier.add(0)
+        frontier.add(0)
+        assert frontier.pull(1) == (2.0, {0})
+        assert frontier.pull(10) == (math.inf, {1})
+        assert not frontier
+
+    def test_decreased_vertex_is_pulled_at_new_key(self):
+        db = [4.0, 2.0, 3.0]
+        frontier = _LazyHeapFrontier(db, initial=[0, 1, 2])
+        db[0] = 1.0
+        frontier.add(0)
+        boundary, pulled = frontier.pull(1)
+        assert pulled == {0}
+        assert boundary == 2.0
+        _, pulled = frontier.pull(10)
+        assert pulled == {1, 2}
+
+
+# ---------------------------------------------------------------------------
+# Pivot selection
+# ---------------------------------------------------------------------------
+
+
+class TestFindPivots:
+    def test_source_with_tight_pred_in_W_is_not_a_root(self):
+        # Chain 0 -> 1 -> 2 -> 3 -> 4, and 4 -> 5, 4 -> 6. Vertex 4 is in S
+        # with pred[4] = 3 left tight by an earlier call. The k = 3 rounds
+        # reach 3 in the last round, so 3 -> 4 is not relaxed again here.
+        g = Graph(8)
+        for u in range(4):
+            g.add_edge(u, u + 1, 1.0)
+        g.add_edge(4, 5, 1.0)
+        g.add_edge(4, 6, 1.0)
+        state = _BMSSPState.initial(g, 0)
+        assert state.k == 3
+        state.db[4] = 4.0
+        state.pred[4] = 3
+        state.pred_weight[4] = 1.0
+        state.db[7] = 0.0
+
+        pivots, W = _find_pivots(state, math.inf, {0, 4, 7})
+
+        assert set(W) == set(range(8))
+        # 4 hangs under 3 in the tight forest, so only 0 roots a subtree of
+        # size >= k.
+        assert pivots == {0}
+        assert not any(state.in_W)
+
+
 # ---------------------------------------------------------------------------
 # Numeric robustness
 # ---------------------------------------------------------------------------